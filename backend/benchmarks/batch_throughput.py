@@ -0,0 +1,87 @@
+"""
+Throughput of /hr/query/batch against the same questions sent one call at a time.
+
+Run the backend first (uvicorn main:app --port 8000), then:
+    uv run benchmarks/batch_throughput.py --url http://127.0.0.1:8000 --count 100
+    uv run benchmarks/batch_throughput.py --questions questions.txt --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+SAMPLE_QUESTIONS = [
+    "What is the maternity leave policy?",
+    "How many days of notice period do I need to serve?",
+    "Is there a paternity leave policy?",
+    "Can I carry forward unused leaves?",
+    "How do I apply for sick leave?",
+    "What are the rules for casual leave?",
+]
+
+
+def load_questions(path, count):
+    if path:
+        with open(path) as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = SAMPLE_QUESTIONS
+    return [questions[i % len(questions)] for i in range(count)]
+
+
+async def run_sequential(session, url, questions, user_id):
+    started = time.perf_counter()
+    for q in questions:
+        async with session.post(f"{url}/hr/query", json={"query": q, "user_id": user_id}) as resp:
+            await resp.json()
+    return time.perf_counter() - started
+
+
+async def run_batch(session, url, questions, user_id, concurrency):
+    payload = {
+        "queries": [{"query": q, "user_id": user_id} for q in questions],
+        "max_concurrency": concurrency,
+    }
+    started = time.perf_counter()
+    first_result = None
+    received = 0
+    async with session.post(f"{url}/hr/query/batch", json=payload) as resp:
+        async for line in resp.content:
+            if not line.strip():
+                continue
+            json.loads(line)
+            received += 1
+            if first_result is None:
+                first_result = time.perf_counter() - started
+    return time.perf_counter() - started, first_result, received
+
+
+async def main(args):
+    questions = load_questions(args.questions, args.count)
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        seq_total = await run_sequential(session, args.url, questions, args.user_id)
+        batch_total, first, received = await run_batch(
+            session, args.url, questions, args.user_id, args.concurrency
+        )
+
+    n = len(questions)
+    print(f"questions: {n}")
+    print(f"sequential: {seq_total:.2f} s total, {n / seq_total:.2f} q/s")
+    print(
+        f"batch:      {batch_total:.2f} s total, {received / batch_total:.2f} q/s, "
+        f"first result after {first or 0:.2f} s (concurrency={args.concurrency})"
+    )
+    print(f"speedup:    {seq_total / batch_total:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--questions", help="text file with one question per line")
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Latency, throughput, memory and retrieval quality of each embedding backend.
+
+Each backend runs in its own subprocess so RSS and imported modules are isolated.
+Retrieval quality is top-k overlap and query-vector cosine against the torch backend,
+searching the chunks stored in the FAISS index:
+    uv run benchmarks/embedding_backends.py --backends torch onnx onnx-int8
+"""
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import time
+from statistics import median
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+QUERIES = [
+    "What is the maternity leave policy?",
+    "How many days of notice period do I need to serve?",
+    "Is there a paternity leave policy?",
+    "Can I carry forward unused leaves?",
+    "How do I apply for sick leave?",
+    "Who approves leave requests?",
+    "Are public holidays counted as leave?",
+    "What happens to leave balance when I resign?",
+]
+
+
+def load_chunks(index_path):
+    # index.pkl is (docstore, index_to_docstore_id) as written by FAISS.save_local
+    with open(os.path.join(index_path, "index.pkl"), "rb") as f:
+        docstore, index_to_id = pickle.load(f)
+    ids = [index_to_id[i] for i in range(len(index_to_id))]
+    return ids, [docstore.search(i).page_content for i in ids]
+
+
+def worker(backend, index_path, k, repeats):
+    import numpy as np
+
+    started = time.perf_counter()
+    from core.embeddings import get_embedding_model
+
+    model = get_embedding_model(backend)
+    model.encode(["warm up"])
+    load_seconds = time.perf_counter() - started
+
+    single = []
+    for _ in range(repeats):
+        for q in QUERIES:
+            t = time.perf_counter()
+            model.encode([q])
+            single.append(time.perf_counter() - t)
+
+    ids, chunks = load_chunks(index_path)
+    t = time.perf_counter()
+    chunk_vectors = model.encode(chunks)
+    batch_seconds = time.perf_counter() - t
+
+    query_vectors = model.encode(QUERIES)
+    top_k = [[ids[j] for j in np.argsort(-(chunk_vectors @ q))[:k]] for q in query_vectors]
+
+    return {
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "query_p50_ms": round(median(single) * 1000, 2),
+        "throughput_per_s": round(len(chunks) / batch_seconds, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "torch_loaded": "torch" in sys.modules,
+        "top_k": top_k,
+        "query_vectors": query_vectors.tolist(),
+    }
+
+
+def compare(reference, other):
+    import numpy as np
+
+    overlap = [len(set(a) & set(b)) / len(a) for a, b in zip(reference["top_k"], other["top_k"])]
+    ref, cur = np.array(reference["query_vectors"]), np.array(other["query_vectors"])
+    cosine = (ref * cur).sum(axis=1)
+    return sum(overlap) / len(overlap), float(cosine.mean())
+
+
+def main(args):
+    results = []
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, "--index", args.index, "--k", str(args.k),
+             "--repeats", str(args.repeats)],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr[-2000:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    reference = next((r for r in results if r["backend"] == "torch"), results[0] if results else None)
+    print(f"{'backend':<11}{'load s':>8}{'p50 ms':>9}{'chunks/s':>10}{'RSS MB':>9}{'torch':>7}"
+          f"{'top-' + str(args.k) + ' overlap':>15}{'cosine':>9}")
+    for r in results:
+        overlap, cosine = compare(reference, r)
+        print(f"{r['backend']:<11}{r['load_s']:>8}{r['query_p50_ms']:>9}{r['throughput_per_s']:>10}"
+              f"{r['max_rss_mb']:>9}{str(r['torch_loaded']):>7}{overlap:>15.2f}{cosine:>9.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--index", default="faiss_hr_policy_index")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.index, args.k, args.repeats)))
+    else:
+        main(args)
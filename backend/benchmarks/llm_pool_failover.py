@@ -0,0 +1,161 @@
+"""
+Exercise LLMPool against local fake Ollama servers (no real model needed).
+
+Starts several in-process HTTP servers that mimic POST /api/generate with a
+configurable delay, then checks balancing, failover, circuit breaking (incl. half-open probes),
+per-call budgets and per-task model routing:
+    uv run benchmarks/llm_pool_failover.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_pool import LLMPool, LLMUnavailableError  # noqa: E402
+
+
+class FakeOllama:
+    def __init__(self, name: str, delay: float = 0.05):
+        self.name = name
+        self.delay = delay
+        self.down = False
+        self.calls = Counter()  # model -> count
+        self.attempts = 0  # every request received, including rejected ones
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.attempts += 1
+                if fake.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    self.wfile.write(b'{"error": "overloaded"}')
+                    return
+                time.sleep(fake.delay)
+                fake.calls[body["model"]] += 1
+                payload = json.dumps(
+                    {
+                        "model": body["model"],
+                        "created_at": "2025-01-01T00:00:00Z",
+                        "response": f"{fake.name}:{body['model']}",
+                        "done": True,
+                    }
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+def make_pool(nodes, **kwargs):
+    return LLMPool(
+        [n.url for n in nodes],
+        task_models={"classify": "tiny", "rephrase": "tiny"},
+        default_model="big",
+        timeout=5,
+        **kwargs,
+    )
+
+
+def fire(pool, n, task="rag", workers=16):
+    with ThreadPoolExecutor(workers) as ex:
+        return list(ex.map(lambda _: pool.generate("hello", task=task), range(n)))
+
+
+def check_balancing():
+    fast, slow = FakeOllama("fast", delay=0.02), FakeOllama("slow", delay=0.2)
+    fire(make_pool([fast, slow]), 200)
+    print(f"balancing: fast={fast.total()} slow={slow.total()}")
+    assert fast.total() > slow.total(), "least-outstanding should favour the faster node"
+
+
+def check_failover_and_breaker():
+    a, b = FakeOllama("a"), FakeOllama("b")
+    a.down = True
+    pool = make_pool([a, b], failure_threshold=2, cooldown=60)
+    answers = fire(pool, 50, workers=4)
+    assert all(ans.startswith("b:") for ans in answers), "every call should fail over to b"
+    status = {s["base_url"]: s for s in pool.status()}
+    assert status[a.url]["circuit_open"], "a should be circuit-broken after repeated failures"
+    # Only the calls already in flight when the breaker tripped may reach the dead node
+    assert a.attempts <= 2 + 4, f"open circuit still received traffic ({a.attempts} attempts)"
+    print(f"failover: 50/50 answered by b, circuit open on a, a saw {a.attempts} attempts")
+
+    b.down = True
+    try:
+        pool.generate("hello")
+    except LLMUnavailableError as e:
+        print(f"all down: LLMUnavailableError raised ({str(e)[:60]}...)")
+    else:
+        raise AssertionError("expected LLMUnavailableError when every node is down")
+
+
+def check_half_open():
+    a, b = FakeOllama("a"), FakeOllama("b")
+    a.down = True
+    pool = make_pool([a, b], failure_threshold=1, cooldown=0.3)
+    fire(pool, 5, workers=1)
+    before = a.attempts
+    time.sleep(0.35)
+    fire(pool, 20, workers=8)
+    probes = a.attempts - before
+    assert probes == 1, f"expected one half-open probe per cooldown window, got {probes}"
+
+    a.down = False
+    time.sleep(0.35)
+    fire(pool, 20, workers=8)
+    assert not pool.status()[0]["circuit_open"], "a successful probe should close the circuit"
+    assert a.total() > 1, "a closed node should take traffic again"
+    print(f"half-open: 1 probe while down, circuit closed after recovery ({a.total()} calls served by a)")
+
+
+def check_budget():
+    slow = FakeOllama("slow", delay=1.0)
+    pool = make_pool([slow], failure_threshold=1)
+    started = time.perf_counter()
+    try:
+        pool.generate("hello", timeout=0.2)
+    except LLMUnavailableError:
+        pass
+    else:
+        raise AssertionError("expected the per-call budget to cut the generation short")
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.5, f"budget not honoured ({elapsed:.2f}s)"
+    assert not pool.status()[0]["circuit_open"], "a caller-side budget must not trip the breaker"
+    print(f"budget: gave up after {elapsed:.2f}s, circuit still closed")
+
+
+def check_routing():
+    node = FakeOllama("n")
+    pool = make_pool([node])
+    fire(pool, 10, task="classify")
+    fire(pool, 5, task="rag")
+    print(f"routing: {dict(node.calls)}")
+    assert node.calls == Counter({"tiny": 10, "big": 5})
+
+
+if __name__ == "__main__":
+    check_balancing()
+    check_failover_and_breaker()
+    check_half_open()
+    check_budget()
+    check_routing()
+    print("✅ LLM pool behaves as expected")
@@ -0,0 +1,82 @@
+"""
+Tool-call throughput of the MCP server as the number of stateless workers grows.
+
+Spawns `mcp/mcp_server.py --workers N` for each N, waits for /health, then fires
+concurrent tool calls through the backend's load-balancing client:
+    uv run benchmarks/mcp_load.py --workers 1 2 4 --calls 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.mcp_client import MCPClientPool  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_healthy(pool: MCPClientPool, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await pool.check_health()
+        if all(e.healthy for e in pool.endpoints):
+            return
+        await asyncio.sleep(0.5)
+    raise RuntimeError("MCP workers did not become healthy")
+
+
+async def run_load(pool: MCPClientPool, tool: str, args: dict, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            try:
+                await pool.call_tool(tool, args)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - started, errors
+
+
+async def main(args):
+    tool_args = {"name": "bench"} if args.tool == "say_hello" else {"limit": 5}
+    baseline = None
+    print(f"{'workers':>8}{'calls/s':>10}{'errors':>8}{'scaling':>9}")
+    for workers in args.workers:
+        proc = subprocess.Popen(
+            [sys.executable, "mcp/mcp_server.py", "--workers", str(workers), "--port", str(args.port)],
+            cwd=BACKEND_DIR,
+            start_new_session=True,  # own process group, so every worker can be stopped
+        )
+        pool = MCPClientPool([f"http://127.0.0.1:{args.port + i}/mcp" for i in range(workers)])
+        try:
+            await wait_healthy(pool)
+            await run_load(pool, args.tool, tool_args, min(args.calls, 20), args.concurrency)  # warm-up
+            seconds, errors = await run_load(pool, args.tool, tool_args, args.calls, args.concurrency)
+            throughput = args.calls / seconds
+            baseline = baseline or throughput
+            print(f"{workers:>8}{throughput:>10.1f}{errors:>8}{throughput / baseline:>8.2f}x")
+        finally:
+            await pool.close()
+            # Stop the parent and all workers so the next round can bind the same ports
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8150)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--tool", default="list_users", choices=["list_users", "say_hello"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+"""
+Per-turn latency of multi-turn conversations with and without a session id.
+
+Run the backend first (uvicorn main:app --port 8000), then:
+    uv run benchmarks/session_turns.py --url http://127.0.0.1:8000 --user-id <id> --rounds 3
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from statistics import median
+
+import aiohttp
+
+CONVERSATIONS = [
+    [
+        "What is the maternity leave policy?",
+        "and for paternity?",
+        "what about adoption leave?",
+        "also, can it be extended?",
+    ],
+    [
+        "How many leaves do I have left?",
+        "and how many in total?",
+        "what about after this month?",
+    ],
+]
+
+
+async def run_conversation(session, url, turns, user_id, session_id):
+    timings = []
+    for query in turns:
+        payload = {"query": query, "user_id": user_id, "session_id": session_id}
+        started = time.perf_counter()
+        async with session.post(f"{url}/hr/query", json=payload) as resp:
+            await resp.json()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def main(args):
+    per_turn = defaultdict(lambda: defaultdict(list))
+    async with aiohttp.ClientSession() as session:
+        for _ in range(args.rounds):
+            for turns in CONVERSATIONS:
+                for label, session_id in (("stateless", None), ("session", str(uuid.uuid4()))):
+                    timings = await run_conversation(session, args.url, turns, args.user_id, session_id)
+                    for turn, seconds in enumerate(timings, start=1):
+                        per_turn[turn][label].append(seconds)
+
+        async with session.get(f"{args.url}/hr/metrics") as resp:
+            sessions = (await resp.json()).get("sessions", {})
+
+    print(f"{'turn':>4}{'stateless p50':>16}{'session p50':>14}{'saved':>9}")
+    for turn, by_label in sorted(per_turn.items()):
+        stateless = median(by_label["stateless"]) * 1000
+        with_session = median(by_label["session"]) * 1000
+        print(f"{turn:>4}{stateless:>13.1f} ms{with_session:>11.1f} ms{100 * (1 - with_session / stateless):>8.1f}%")
+    print(f"\nServer-side reuse counts (work skipped): {sessions.get('reuse', {})}")
+    print(f"Server-side merge counts (context added): {sessions.get('merged', {})}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+"""
+Compare sequential vs speculative execution of /hr/query per intent.
+
+Run the backend first (uvicorn main:app --port 8000), then:
+    uv run benchmarks/speculative_latency.py --url http://127.0.0.1:8000 --user-id <id> --rounds 10
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from statistics import median
+
+import aiohttp
+
+SAMPLE_QUERIES = {
+    "policy_query": "What is the maternity leave policy?",
+    "leave_balance": "How many leaves do I have left?",
+    "general": "Hello, what can you do?",
+    "list_users": "Show me all users",
+}
+
+
+async def timed_query(session, url, query, user_id, speculative):
+    payload = {"query": query, "user_id": user_id, "speculative": speculative}
+    started = time.perf_counter()
+    async with session.post(f"{url}/hr/query", json=payload) as resp:
+        body = await resp.json()
+    return body.get("intent", "error"), time.perf_counter() - started
+
+
+async def main(args):
+    results = defaultdict(lambda: defaultdict(list))
+    async with aiohttp.ClientSession() as session:
+        for _ in range(args.rounds):
+            for query in SAMPLE_QUERIES.values():
+                # Alternate modes so both see the same backend conditions
+                for speculative in (False, True):
+                    intent, seconds = await timed_query(session, args.url, query, args.user_id, speculative)
+                    results[intent]["speculative" if speculative else "sequential"].append(seconds)
+
+        async with session.get(f"{args.url}/hr/metrics") as resp:
+            server_side = (await resp.json()).get("latency", {})
+
+    print(f"{'intent':<22}{'sequential p50':>16}{'speculative p50':>17}{'reduction':>11}")
+    for intent, by_mode in sorted(results.items()):
+        seq = median(by_mode["sequential"]) * 1000 if by_mode["sequential"] else 0.0
+        spec = median(by_mode["speculative"]) * 1000 if by_mode["speculative"] else 0.0
+        reduction = f"{100 * (1 - spec / seq):.1f}%" if seq else "n/a"
+        print(f"{intent:<22}{seq:>13.1f} ms{spec:>14.1f} ms{reduction:>11}")
+
+    print("\nServer-side critical path (from /hr/metrics):")
+    for intent, entry in sorted(server_side.items()):
+        print(f"  {intent}: {entry}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,174 @@
+"""
+Replay captured /hr/query traffic and diff two runs.
+
+Capture with TRAFFIC_CAPTURE_PATH=traffic.jsonl (rotated files: traffic.jsonl.1, ...), then:
+    uv run benchmarks/traffic_replay.py replay traffic.jsonl* --target http://127.0.0.1:8000 --speed 2 --out run_b.jsonl
+    uv run benchmarks/traffic_replay.py diff --baseline traffic.jsonl* --candidate run_b.jsonl
+
+Requests are re-issued at their original relative offsets divided by --speed
+(--speed 0 sends them back-to-back). User ids are pseudonymized in the capture,
+so pass --user-id to give leave-balance queries a real user on the target.
+Tool-intent requests (add_user, delete_user, ...) are captured without their
+query text, so they are skipped on replay and show up as unmatched in `diff`.
+Replay output keeps each request's capture index (`seq`) and query, and `diff`
+pairs runs on those, so a capture spread over rotated files compares correctly.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter, defaultdict
+from statistics import mean, median
+
+import aiohttp
+
+
+def load_records(paths):
+    records = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    # Rotated capture files are oldest-last; arrival timestamps restore the original
+    # sequence, and the position in that sequence is the capture index (`seq`)
+    if all("seq" in r for r in records):
+        records.sort(key=lambda r: r["seq"])
+    else:
+        records.sort(key=lambda r: r.get("ts", 0))
+        for seq, record in enumerate(records):
+            record["seq"] = seq
+    return records
+
+
+async def replay(args):
+    records = load_records(args.logs)
+    if not records:
+        print("No captured requests found.")
+        return
+    t0 = records[0]["ts"]
+    skipped = sum(1 for r in records if r.get("query") is None)
+    records = [r for r in records if r.get("query") is not None]
+    sessions = defaultdict(lambda: str(uuid.uuid4()))  # keep conversations grouped on replay
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def fire(client, record, start):
+        if args.speed > 0:
+            await asyncio.sleep(max(0.0, start + (record["ts"] - t0) / args.speed - time.perf_counter()))
+        payload = {
+            "query": record["query"],
+            "user_id": args.user_id if record.get("user") else None,
+            "session_id": sessions[record["session"]] if record.get("session") else None,
+            "speculative": record.get("speculative"),
+            "deadline_seconds": record.get("deadline_seconds"),
+        }
+        async with semaphore:
+            sent_at = time.time()
+            sent = time.perf_counter()
+            try:
+                async with client.post(f"{args.target}/hr/query", json=payload) as resp:
+                    body = await resp.json()
+                    status = resp.status
+            except aiohttp.ClientError as e:
+                body, status = {"intent": None, "mode": f"error: {e!r}"}, 0
+            latency = time.perf_counter() - sent
+        results.append(
+            {
+                "seq": record["seq"],
+                "ts": round(sent_at, 3),
+                "query": record["query"],
+                "status": status,
+                "latency_ms": round(latency * 1000, 1),
+                "intent": body.get("intent"),
+                "mode": body.get("mode"),
+            }
+        )
+
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(fire(client, r, start) for r in records))
+        wall = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["seq"])
+    with open(args.out, "w") as f:
+        for r in results:
+            f.write(json.dumps(r, separators=(",", ":")) + "\n")
+    print(f"Replayed {len(results)} requests in {wall:.1f}s (speed x{args.speed}) -> {args.out}")
+    if skipped:
+        print(f"Skipped {skipped} tool-intent requests captured without query text.")
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {"n": len(ordered), "mean": mean(ordered), "p50": median(ordered), "p90": pct(0.9), "p99": pct(0.99)}
+
+
+def diff(args):
+    base, other = load_records(args.baseline), load_records(args.candidate)
+    by_seq = {r["seq"]: r for r in other}
+    pairs = [(r, by_seq[r["seq"]]) for r in base if r["seq"] in by_seq]
+    # Guard against diffing a replay of a different capture
+    mismatched = [(x, y) for x, y in pairs if x.get("query") != y.get("query")]
+    pairs = [(x, y) for x, y in pairs if x.get("query") == y.get("query")]
+    print(f"paired {len(pairs)} requests ({len(base) - len(pairs) - len(mismatched)} unmatched, "
+          f"{len(mismatched)} with a different query at the same seq)\n")
+    if not pairs:
+        print("Nothing to compare.")
+        return
+    base, other = [x for x, _ in pairs], [y for _, y in pairs]
+
+    a, b = _summary([r["latency_ms"] for r in base]), _summary([r["latency_ms"] for r in other])
+    print(f"{'latency ms':<12}{'baseline':>10}{'candidate':>11}{'delta':>9}")
+    for key in ("mean", "p50", "p90", "p99"):
+        delta = 100 * (b[key] / a[key] - 1) if a[key] else 0.0
+        print(f"{key:<12}{a[key]:>10.1f}{b[key]:>11.1f}{delta:>8.1f}%")
+    print(f"{'requests':<12}{a['n']:>10}{b['n']:>11}")
+
+    by_intent = defaultdict(lambda: ([], []))
+    for x, y in pairs:
+        by_intent[x.get("intent")][0].append(x["latency_ms"])
+        by_intent[x.get("intent")][1].append(y["latency_ms"])
+    print(f"\n{'p50 by baseline intent':<24}{'baseline':>10}{'candidate':>11}")
+    for intent, (xs, ys) in sorted(by_intent.items(), key=lambda kv: str(kv[0])):
+        print(f"{str(intent):<24}{median(xs):>10.1f}{median(ys):>11.1f}")
+
+    intent_changes = Counter((x.get("intent"), y.get("intent")) for x, y in pairs if x.get("intent") != y.get("intent"))
+    mode_changes = Counter((x.get("mode"), y.get("mode")) for x, y in pairs if x.get("mode") != y.get("mode"))
+    n = len(pairs)
+    print(f"\nintent agreement: {100 * (1 - sum(intent_changes.values()) / n):.1f}%")
+    for (x, y), count in intent_changes.most_common(10):
+        print(f"  {x} -> {y}: {count}")
+    print(f"mode agreement:   {100 * (1 - sum(mode_changes.values()) / n):.1f}%")
+    for (x, y), count in mode_changes.most_common(10):
+        print(f"  {x} -> {y}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_replay = sub.add_parser("replay", help="re-issue captured traffic against a target instance")
+    p_replay.add_argument("logs", nargs="+", help="capture log files (including rotated ones)")
+    p_replay.add_argument("--target", default="http://127.0.0.1:8000")
+    p_replay.add_argument("--speed", type=float, default=1.0, help="rate multiplier; 0 = as fast as possible")
+    p_replay.add_argument("--concurrency", type=int, default=64, help="max requests in flight")
+    p_replay.add_argument("--user-id", default=None, help="user id substituted for captured (hashed) users")
+    p_replay.add_argument("--out", default="replay_run.jsonl")
+
+    p_diff = sub.add_parser("diff", help="compare latency and intent/mode outcomes of two runs")
+    p_diff.add_argument("--baseline", nargs="+", required=True, help="capture log files or a replay output")
+    p_diff.add_argument("--candidate", nargs="+", required=True, help="replay output")
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        asyncio.run(replay(args))
+    else:
+        diff(args)
@@ -6,6 +6,17 @@ load_dotenv()
 # LLM + FAISS
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://192.168.31.152:11434")
 LLM_MODEL = os.getenv("LLM_MODEL", "gemma3:1b")
+# Small model for intent classification and rephrasing (defaults to LLM_MODEL)
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", LLM_MODEL)
+# Pool of Ollama hosts (comma separated); falls back to OLLAMA_BASE_URL
+OLLAMA_BASE_URLS = [
+    u.strip() for u in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if u.strip()
+]
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+# Threads reserved for LLM calls, separate from the default executor
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
 FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "faiss_hr_policy_index")
 
 # MongoDB
@@ -15,3 +26,48 @@ MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "users")
 
 # APIs
 LEAVE_BALANCE_API = os.getenv("LEAVE_BALANCE_API", "http://localhost:8080/user")
+
+# Request deadlines (seconds)
+QUERY_DEADLINE_SECONDS = float(os.getenv("QUERY_DEADLINE_SECONDS", "30"))
+INTENT_TIMEOUT_SECONDS = float(os.getenv("INTENT_TIMEOUT_SECONDS", "5"))
+
+# Start retrieval / user lookup alongside intent classification
+SPECULATIVE_EXECUTION = os.getenv("SPECULATIVE_EXECUTION", "false").lower() == "true"
+
+# Batch queries: max LLM-backed answers generated at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+# Larger batches are rejected with 422
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "200"))
+
+# Precomputed FAQ answers (built by the policy pipeline with --generate_faq true)
+FAQ_INDEX_PATH = os.getenv("FAQ_INDEX_PATH", "faq_answer_index")
+FAQ_QUESTIONS_PATH = os.getenv("FAQ_QUESTIONS_PATH", "faq_questions.json")
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.9"))
+FAQ_MINED_TOP_N = int(os.getenv("FAQ_MINED_TOP_N", "20"))
+FAQ_MINED_MIN_COUNT = int(os.getenv("FAQ_MINED_MIN_COUNT", "3"))
+# Append policy questions here so the pipeline can mine frequent ones (empty = off)
+POLICY_QUERY_LOG = os.getenv("POLICY_QUERY_LOG", "")
+
+# MCP tool servers (comma separated; /mcp = streamable HTTP, /sse = legacy SSE)
+MCP_SERVER_URLS = [
+    u.strip() for u in os.getenv("MCP_SERVER_URLS", "http://127.0.0.1:8050/mcp").split(",") if u.strip()
+]
+MCP_HEALTH_INTERVAL_SECONDS = float(os.getenv("MCP_HEALTH_INTERVAL_SECONDS", "10"))
+
+# Embeddings: "torch" (sentence-transformers), "onnx" or "onnx-int8" (torch-free)
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Minimum mean cosine between stored and re-embedded chunks to reuse a FAISS index
+EMBEDDING_COMPAT_THRESHOLD = float(os.getenv("EMBEDDING_COMPAT_THRESHOLD", "0.98"))
+
+# Conversation sessions (in-process, per worker)
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "6"))
+SESSION_MAX_CHUNKS = int(os.getenv("SESSION_MAX_CHUNKS", "8"))
+
+# Traffic capture for replay (empty path = off)
+TRAFFIC_CAPTURE_PATH = os.getenv("TRAFFIC_CAPTURE_PATH", "")
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0"))
+TRAFFIC_CAPTURE_MAX_BYTES = int(os.getenv("TRAFFIC_CAPTURE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRAFFIC_CAPTURE_BACKUPS = int(os.getenv("TRAFFIC_CAPTURE_BACKUPS", "5"))
@@ -23,18 +23,50 @@ async def close_mongo_connection():
         print("🧹 MongoDB connection closed")
 
 
+def _format_user(user: dict) -> dict:
+    return {
+        "id": str(user.get("_id", "")),
+        "name": user.get("username", "Unknown"),
+        "remaining_leaves": user.get("leave_balance", 0),
+        "total_leaves": user.get("total_leaves", 100),
+    }
+
+
 async def get_user_details(user_id: str):
     try:
         query = {"_id": ObjectId(user_id)} if ObjectId.is_valid(user_id) else {"user_id": user_id}
         user = await users_collection.find_one(query)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return {
-            "id": str(user.get("_id", "")),
-            "name": user.get("username", "Unknown"),
-            "remaining_leaves": user.get("leave_balance", 0),
-            "total_leaves": user.get("total_leaves", 100),
-        }
+        return _format_user(user)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error fetching user: {e}")
         raise HTTPException(status_code=500, detail="Database error")
+
+
+async def get_users_details(user_ids):
+    """
+    Fetch many users with a single $in query.
+    Returns a dict keyed by the requested id; ids with no match are left out.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    object_ids = [ObjectId(u) for u in user_ids if ObjectId.is_valid(u)]
+    try:
+        cursor = users_collection.find(
+            {"$or": [{"_id": {"$in": object_ids}}, {"user_id": {"$in": user_ids}}]}
+        )
+        users = await cursor.to_list(length=None)
+    except Exception as e:
+        print(f"❌ Error fetching users: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    found = {}
+    for user in users:
+        for key in (str(user.get("_id", "")), user.get("user_id")):
+            if key in user_ids:
+                found[key] = _format_user(user)
+    return found
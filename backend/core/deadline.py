@@ -0,0 +1,45 @@
+import asyncio
+import inspect
+import time
+from typing import Awaitable, Optional
+
+from core import traffic
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline stage cannot finish inside the request budget."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during '{stage}'")
+        self.stage = stage
+
+
+class Deadline:
+    """Absolute time budget carried through every stage of a single query."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+async def run_within(deadline: Deadline, stage: str, aw: Awaitable, cap: Optional[float] = None):
+    """
+    Await `aw` for at most the remaining budget (or `cap`, whichever is smaller).
+    Blocking calls should be wrapped with asyncio.to_thread by the caller.
+    """
+    budget = deadline.remaining()
+    if cap is not None:
+        budget = min(budget, cap)
+    if budget <= 0:
+        if inspect.iscoroutine(aw):
+            aw.close()
+        raise DeadlineExceeded(stage)
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(aw, timeout=budget)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(stage)
+    finally:
+        traffic.add_stage(stage, time.perf_counter() - started)
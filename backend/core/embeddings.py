@@ -0,0 +1,151 @@
+import platform
+from abc import abstractmethod
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.config import EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+
+# Quantized exports shipped in the sentence-transformers hub repo, per CPU family
+INT8_ONNX_FILES = {
+    "arm64": "onnx/model_qint8_arm64.onnx",
+    "aarch64": "onnx/model_qint8_arm64.onnx",
+}
+DEFAULT_INT8_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceEmbeddings(Embeddings):
+    """LangChain embeddings with an extra `encode` returning unit-norm float32 arrays."""
+
+    backend = "base"
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-norm float32 vectors, one row per text."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+class TorchEmbeddings(SentenceEmbeddings):
+    backend = "torch"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def __reduce__(self):
+        # Pickle (e.g. as a Metaflow artifact) by name, not by weights
+        return (TorchEmbeddings, (self.model_name,))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vectors, dtype="float32")
+
+
+class OnnxEmbeddings(SentenceEmbeddings):
+    """
+    Torch-free MiniLM: ONNX Runtime + HF tokenizers, with the same mean pooling and
+    normalization as the sentence-transformers pipeline.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, quantized: bool = False, batch_size: int = 32):
+        try:
+            import onnxruntime as ort
+            from huggingface_hub import hf_hub_download
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("ONNX embeddings need `onnxruntime`, `tokenizers` and `huggingface_hub`") from e
+
+        self.backend = "onnx-int8" if quantized else "onnx"
+        self.model_name = model_name
+        self.quantized = quantized
+        self.batch_size = batch_size
+        onnx_file = (
+            INT8_ONNX_FILES.get(platform.machine().lower(), DEFAULT_INT8_ONNX_FILE) if quantized else "onnx/model.onnx"
+        )
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=256)  # MiniLM max_seq_length
+        self.tokenizer.enable_padding()
+        self.session = ort.InferenceSession(
+            hf_hub_download(model_name, onnx_file), providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __reduce__(self):
+        # InferenceSession is not picklable; rebuild it from the cached hub files
+        return (OnnxEmbeddings, (self.model_name, self.quantized, self.batch_size))
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype="int64")
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype="int64")
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[..., None].astype("float32")
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return _normalize(pooled.astype("float32"))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        return np.vstack([self._encode_batch(texts[i : i + self.batch_size]) for i in range(0, len(texts), self.batch_size)])
+
+
+def get_embedding_model(backend: str = EMBEDDING_BACKEND) -> SentenceEmbeddings:
+    if backend == "torch":
+        return TorchEmbeddings()
+    if backend == "onnx":
+        return OnnxEmbeddings(quantized=False)
+    if backend == "onnx-int8":
+        return OnnxEmbeddings(quantized=True)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}' (expected torch, onnx or onnx-int8)")
+
+
+def index_compatibility(db, embedding_model: SentenceEmbeddings, sample: int = 8) -> float:
+    """Mean cosine between vectors stored in a FAISS index and the same chunks re-embedded now."""
+    positions = range(min(sample, db.index.ntotal))
+    stored = _normalize(np.vstack([db.index.reconstruct(i) for i in positions]).astype("float32"))
+    texts = [db.docstore.search(db.index_to_docstore_id[i]).page_content for i in positions]
+    fresh = embedding_model.encode(texts)
+    return float((stored * fresh).sum(axis=1).mean())
+
+
+def ensure_index_compatible(db, index_path: str, embedding_model: SentenceEmbeddings, threshold: float):
+    """
+    Reuse the FAISS index if the active backend reproduces its vectors; otherwise
+    re-embed the stored chunks (same docstore ids) and save the rebuilt index.
+    """
+    from langchain_community.vectorstores import FAISS
+    from core.faq import read_index_metadata, write_index_version
+
+    meta = read_index_metadata(index_path)
+    if meta.get("embedding_backend") == embedding_model.backend or db.index.ntotal == 0:
+        return db
+
+    score = index_compatibility(db, embedding_model)
+    if score >= threshold:
+        print(f"✅ FAISS index compatible with '{embedding_model.backend}' embeddings (cosine {score:.4f})")
+        return db
+
+    print(f"♻️ FAISS index incompatible with '{embedding_model.backend}' (cosine {score:.4f}); rebuilding")
+    ids = [db.index_to_docstore_id[i] for i in range(db.index.ntotal)]
+    docs = [db.docstore.search(doc_id) for doc_id in ids]
+    rebuilt = FAISS.from_documents(docs, embedding_model, ids=ids)
+    rebuilt.save_local(index_path)
+    write_index_version(index_path, meta.get("version"), embedding_backend=embedding_model.backend)
+    return rebuilt
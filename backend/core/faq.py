@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from core.config import POLICY_QUERY_LOG
+from core.traffic import redact
+
+INDEX_VERSION_FILE = "index_version.json"
+FAQ_ANSWERS_FILE = "answers.json"
+FAQ_EMBEDDINGS_FILE = "questions.npy"
+
+
+# ---- Index versioning ----
+
+def compute_policy_version(pdf_dir: str) -> str:
+    """Hash of every source PDF (name + bytes); changes whenever a policy document changes."""
+    digest = hashlib.sha256()
+    for name in sorted(f for f in os.listdir(pdf_dir) if f.lower().endswith(".pdf")):
+        digest.update(name.encode())
+        with open(os.path.join(pdf_dir, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def write_index_version(index_path: str, version: str, **extra):
+    payload = {"version": version, "built_at": datetime.now(timezone.utc).isoformat(), **extra}
+    with open(os.path.join(index_path, INDEX_VERSION_FILE), "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def read_index_metadata(index_path: str) -> dict:
+    try:
+        with open(os.path.join(index_path, INDEX_VERSION_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_index_version(index_path: str) -> Optional[str]:
+    return read_index_metadata(index_path).get("version")
+
+
+# ---- FAQ question sources ----
+
+def _normalize(query: str) -> str:
+    return re.sub(r"\s+", " ", query.strip().lower()).rstrip("?!. ")
+
+
+def log_policy_query(query: str):
+    """
+    Append a policy question to POLICY_QUERY_LOG for frequent-query mining.
+    Emails, phone-like numbers and ids are redacted first; other free text
+    (e.g. names) is kept, so treat the log as sensitive. Blocking: call from a thread.
+    """
+    if not POLICY_QUERY_LOG:
+        return
+    try:
+        with open(POLICY_QUERY_LOG, "a") as f:
+            f.write(json.dumps({"query": redact(query)}) + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not log policy query: {e}")
+
+
+def load_faq_questions(path: str) -> List[str]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [q for q in json.load(f) if isinstance(q, str) and q.strip()]
+
+
+def mine_frequent_queries(log_path: str, top_n: int, min_count: int) -> List[str]:
+    """Most frequent logged policy questions (after light normalization)."""
+    if not log_path or not os.path.exists(log_path):
+        return []
+    counts, first_seen = Counter(), {}
+    with open(log_path) as f:
+        for line in f:
+            try:
+                query = json.loads(line)["query"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            key = _normalize(query)
+            if key:
+                counts[key] += 1
+                first_seen.setdefault(key, query.strip())
+    return [first_seen[k] for k, c in counts.most_common(top_n) if c >= min_count]
+
+
+def merge_questions(*question_lists) -> List[str]:
+    seen, merged = set(), []
+    for questions in question_lists:
+        for q in questions:
+            key = _normalize(q)
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(q.strip())
+    return merged
+
+
+# ---- Stored answers ----
+
+def _unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def read_faq_version(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, FAQ_ANSWERS_FILE)) as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+def faq_answers_stale(path: str, index_version: str) -> bool:
+    """True when stored answers exist but were generated for a different index version."""
+    return os.path.exists(os.path.join(path, FAQ_ANSWERS_FILE)) and read_faq_version(path) != index_version
+
+
+def save_faq_index(path: str, entries: List[dict], embeddings, version: str, embedding_backend: str):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, FAQ_EMBEDDINGS_FILE), _unit(embeddings))
+    payload = {"version": version, "embedding_backend": embedding_backend, "entries": entries}
+    with open(os.path.join(path, FAQ_ANSWERS_FILE), "w") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+class FAQIndex:
+    """Nearest-neighbour lookup over precomputed answers to canonical policy questions."""
+
+    def __init__(self, entries: List[dict], embeddings: np.ndarray, embedding_model, threshold: float):
+        self.entries = entries
+        self.embeddings = embeddings
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: str, index_path: str, embedding_model, threshold: float):
+        """Load stored answers, or return None if missing or built against another index version."""
+        answers_file = os.path.join(path, FAQ_ANSWERS_FILE)
+        if not os.path.exists(answers_file):
+            return None
+        with open(answers_file) as f:
+            stored = json.load(f)
+        current = read_index_version(index_path)
+        if not current or stored.get("version") != current:
+            print(f"⚠️ FAQ answers are stale (built for {stored.get('version')}, index is {current}); ignoring")
+            return None
+        if stored.get("embedding_backend") == getattr(embedding_model, "backend", None):
+            embeddings = np.load(os.path.join(path, FAQ_EMBEDDINGS_FILE))
+        else:
+            # Question vectors must come from the same backend as query vectors
+            embeddings = _unit(embedding_model.embed_documents([e["question"] for e in stored["entries"]]))
+        print(f"✅ Loaded {len(stored['entries'])} precomputed FAQ answers")
+        return cls(stored["entries"], embeddings, embedding_model, threshold)
+
+    def lookup(self, query: str) -> Optional[dict]:
+        if not self.entries:
+            return None
+        q = _unit(self.embedding_model.embed_query(query))
+        scores = self.embeddings @ q
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return {**self.entries[best], "score": float(scores[best])}
@@ -1,9 +1,10 @@
-from sentence_transformers import SentenceTransformer, util
-from core.llm_utils import llm
+from core.llm_utils import call_llm, embedding_model
+from core.llm_pool import LLMBudgetExceeded
+from core import metrics
 import textwrap
 
-# --- Initialize embedding model ---
-intent_model = SentenceTransformer("all-MiniLM-L6-v2")
+# --- Shared embedding model (torch or ONNX, see EMBEDDING_BACKEND) ---
+intent_model = embedding_model
 
 # --- Intent examples for embedding-based fallback ---
 INTENT_EXAMPLES = {
@@ -62,22 +63,21 @@ INTENT_EXAMPLES = {
 }
 
 # --- Precompute embeddings ---
-intent_embeddings = {
-    k: intent_model.encode(v, convert_to_tensor=True) for k, v in INTENT_EXAMPLES.items()
-}
+intent_embeddings = {k: intent_model.encode(v) for k, v in INTENT_EXAMPLES.items()}
 
 
 def detect_intent_embedding(query: str) -> str:
     """
     Lightweight semantic similarity fallback for short user inputs.
     """
-    q_emb = intent_model.encode(query, convert_to_tensor=True)
-    scores = {intent: util.cos_sim(q_emb, emb).max().item() for intent, emb in intent_embeddings.items()}
+    q_emb = intent_model.encode([query])[0]
+    # Vectors are unit-norm, so the dot product is the cosine similarity
+    scores = {intent: float((emb @ q_emb).max()) for intent, emb in intent_embeddings.items()}
     best_intent = max(scores, key=scores.get)
     return best_intent if scores[best_intent] > 0.55 else "unknown"
 
 
-def detect_intent_llm(query: str) -> str:
+def detect_intent_llm(query: str, timeout: float = None) -> str:
     """
     Use local LLM (Ollama) for high-level intent classification.
     """
@@ -124,10 +124,7 @@ def detect_intent_llm(query: str) -> str:
     """)
 
     try:
-        result = llm.invoke(prompt)
-
-        # Extract content safely from LangChain Ollama wrapper
-        text = getattr(result, "content", str(result)).strip().lower()
+        text = call_llm(prompt, task="classify", timeout=timeout).strip().lower()
 
         # Clean common noise
         for intent in [
@@ -145,9 +142,13 @@ def detect_intent_llm(query: str) -> str:
 
         return "general"
 
+    except LLMBudgetExceeded:
+        raise  # the caller owns the deadline and its fallback
     except Exception as e:
-        print(f"⚠️ LLM intent detection failed: {e}")
-        return "general"
+        print(f"⚠️ LLM intent detection failed, using embeddings: {e}")
+        metrics.record_fallback("intent_embedding")
+        intent = detect_intent_embedding(query)
+        return "general" if intent == "unknown" else intent
 
 
 def detect_intent(query: str) -> str:
@@ -0,0 +1,146 @@
+import itertools
+import threading
+import time
+
+import httpx
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no Ollama endpoint could serve a generation."""
+
+
+class LLMBudgetExceeded(LLMUnavailableError):
+    """Raised when the caller's time budget ran out before any endpoint answered."""
+
+
+class OllamaNode:
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.client = httpx.Client(base_url=base_url, timeout=timeout)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        # Circuit breaker: 0 = closed; otherwise skip the node until open_until,
+        # then let exactly one half-open probe through per cooldown window
+        self.open_until = 0.0
+        self.probing = False
+
+    def is_closed(self) -> bool:
+        return self.open_until == 0.0
+
+    def admits(self, now: float) -> bool:
+        return self.is_closed() or (now >= self.open_until and not self.probing)
+
+
+class LLMPool:
+    """
+    Ollama endpoints behind least-outstanding-requests balancing.
+    A node that fails `failure_threshold` times in a row is skipped for `cooldown`
+    seconds, after which a single probe decides whether it closes or stays open;
+    a failed generation is retried once on each other admitted node.
+    Each task name maps to a model, so cheap tasks can run on a smaller model.
+    """
+
+    def __init__(
+        self,
+        base_urls,
+        task_models: dict,
+        default_model: str,
+        timeout: float = 120.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        self.nodes = [OllamaNode(url, timeout) for url in base_urls]
+        self.task_models = task_models
+        self.default_model = default_model
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+
+    def model_for(self, task: str) -> str:
+        return self.task_models.get(task, self.default_model)
+
+    def _acquire(self, tried: set):
+        with self._lock:
+            now = time.monotonic()
+            candidates = [n for n in self.nodes if n not in tried and n.admits(now)]
+            if not candidates:
+                return None
+            offset = next(self._rotation) % len(candidates)
+            rotated = candidates[offset:] + candidates[:offset]
+            node = min(rotated, key=lambda n: n.outstanding)
+            if not node.is_closed():
+                node.probing = True  # the single half-open probe for this window
+            node.outstanding += 1
+            return node
+
+    def _release(self, node: OllamaNode, ok):
+        """ok=None releases the slot without counting a success or a failure."""
+        with self._lock:
+            node.outstanding -= 1
+            was_probe, node.probing = node.probing, False
+            if ok is None:
+                return
+            if ok:
+                node.consecutive_failures = 0
+                node.open_until = 0.0
+                return
+            node.consecutive_failures += 1
+            if was_probe or node.consecutive_failures >= self.failure_threshold:
+                node.open_until = time.monotonic() + self.cooldown
+                print(f"🔌 Circuit open for {node.base_url} ({self.cooldown:.0f}s)")
+
+    def generate(self, prompt: str, task: str = "rag", timeout: float = None) -> str:
+        """
+        `timeout` bounds the whole call, retries included, so a generation abandoned
+        by the caller's deadline does not keep a worker thread busy much longer.
+        """
+        model = self.model_for(task)
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        tried, errors = set(), []
+        while True:
+            remaining = expires_at - time.monotonic() if expires_at is not None else None
+            if remaining is not None and remaining <= 0:
+                raise LLMBudgetExceeded(f"Request budget exhausted for model '{model}'")
+            node = self._acquire(tried)
+            if node is None:
+                break
+            tried.add(node)
+            try:
+                kwargs = {"timeout": remaining} if remaining is not None else {}
+                resp = node.client.post(
+                    "/api/generate", json={"model": model, "prompt": prompt, "stream": False}, **kwargs
+                )
+                resp.raise_for_status()
+                response = resp.json()
+            except httpx.TimeoutException as e:
+                if remaining is not None and remaining < node.timeout:
+                    # The caller's budget ran out, which says nothing about the node's health
+                    self._release(node, ok=None)
+                    raise LLMBudgetExceeded(f"Request budget exhausted for model '{model}'") from e
+                self._release(node, ok=False)
+                errors.append(f"{node.base_url}: {e!r}")
+                print(f"⚠️ LLM node {node.base_url} timed out, trying another: {e!r}")
+                continue
+            except Exception as e:
+                self._release(node, ok=False)
+                errors.append(f"{node.base_url}: {e!r}")
+                print(f"⚠️ LLM node {node.base_url} failed, trying another: {e!r}")
+                continue
+            self._release(node, ok=True)
+            return response["response"]
+        raise LLMUnavailableError(f"All LLM endpoints failed for model '{model}': " + "; ".join(errors))
+
+    def status(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                "base_url": n.base_url,
+                "outstanding": n.outstanding,
+                "consecutive_failures": n.consecutive_failures,
+                "circuit_open": not n.is_closed(),
+                "half_open": not n.is_closed() and now >= n.open_until,
+            }
+            for n in self.nodes
+        ]
@@ -1,14 +1,41 @@
 import os, textwrap
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import faiss
+import numpy as np
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import SentenceTransformerEmbeddings
-from langchain_community.llms import Ollama
-from core.config import FAISS_INDEX_PATH, OLLAMA_BASE_URL, LLM_MODEL
+from core.config import (
+    FAISS_INDEX_PATH,
+    OLLAMA_BASE_URLS,
+    LLM_MODEL,
+    LLM_SMALL_MODEL,
+    LLM_REQUEST_TIMEOUT_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_COOLDOWN_SECONDS,
+    FAQ_INDEX_PATH,
+    FAQ_MATCH_THRESHOLD,
+    EMBEDDING_COMPAT_THRESHOLD,
+)
+from core.embeddings import get_embedding_model, ensure_index_compatible
+from core.llm_pool import LLMPool, LLMUnavailableError
+from core.faq import FAQIndex
 
 # Initialize LLM + embeddings
-embedding_model = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
-llm = Ollama(model=LLM_MODEL, base_url=OLLAMA_BASE_URL)
+embedding_model = get_embedding_model()
+llm_pool = LLMPool(
+    OLLAMA_BASE_URLS,
+    # classify: intent labels, rephrase: short answers around DB/tool output
+    task_models={"classify": LLM_SMALL_MODEL, "rephrase": LLM_SMALL_MODEL},
+    default_model=LLM_MODEL,
+    timeout=LLM_REQUEST_TIMEOUT_SECONDS,
+    failure_threshold=LLM_BREAKER_FAILURES,
+    cooldown=LLM_BREAKER_COOLDOWN_SECONDS,
+)
 
 # Optional FAISS retriever
+db = None
 retriever = None
 if os.path.exists(FAISS_INDEX_PATH):
     db = FAISS.load_local(
@@ -16,18 +43,55 @@ if os.path.exists(FAISS_INDEX_PATH):
         embeddings=embedding_model,
         allow_dangerous_deserialization=True,
     )
+    db = ensure_index_compatible(db, FAISS_INDEX_PATH, embedding_model, EMBEDDING_COMPAT_THRESHOLD)
     retriever = db.as_retriever(search_type="similarity", search_kwargs={"k": 4})
 
+# Optional precomputed answers, only used when built against the current index
+faq_index = None
+if retriever:
+    faq_index = FAQIndex.load(FAQ_INDEX_PATH, FAISS_INDEX_PATH, embedding_model, FAQ_MATCH_THRESHOLD)
 
-def call_llm(prompt: str):
-    """Safe LLM invocation"""
-    try:
-        return llm(prompt)
-    except Exception:
-        try:
-            return llm.invoke(prompt)
-        except Exception as e:
-            return f"Error calling LLM: {repr(e)}"
+
+# LLM calls get their own threads, so a generation abandoned at its deadline
+# cannot starve the default executor used by retrieval and embeddings
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+
+def call_llm(prompt: str, task: str = "rag", timeout: float = None) -> str:
+    """
+    Generate with the model routed for `task` on the least busy healthy endpoint.
+    Raises LLMUnavailableError when every endpoint failed or `timeout` ran out.
+    """
+    return llm_pool.generate(prompt, task=task, timeout=timeout)
+
+
+async def run_in_llm_executor(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(llm_executor, functools.partial(fn, *args, **kwargs))
+
+
+def batch_retrieve(queries, k=4):
+    """
+    Embed all queries in one batch and run a single multi-query FAISS search.
+    Returns one list of documents per query, in input order.
+    """
+    if db is None or not queries:
+        return [[] for _ in queries]
+    vectors = np.asarray(embedding_model.embed_documents(list(queries)), dtype="float32")
+    if getattr(db, "_normalize_L2", False):
+        faiss.normalize_L2(vectors)
+    _, indices = db.index.search(vectors, k)
+    results = []
+    for row in indices:
+        docs = []
+        for i in row:
+            if i == -1:
+                continue
+            doc = db.docstore.search(db.index_to_docstore_id[i])
+            if not isinstance(doc, str):  # docstore returns an error string for missing ids
+                docs.append(doc)
+        results.append(docs)
+    return results
 
 
 def build_prompt_from_docs(docs, question, max_chars_per_doc=1200, max_total_chars=6000):
@@ -55,3 +119,13 @@ def build_prompt_from_docs(docs, question, max_chars_per_doc=1200, max_total_cha
     2) Bullet list of sources (filenames)
     3) If not found, say you didn’t find it.
     """).strip()
+
+
+def format_docs_as_answer(docs, max_docs=3, max_chars_per_doc=400):
+    """Plain retrieved snippets, used when there is no time left for LLM synthesis."""
+    parts = []
+    for d in docs[:max_docs]:
+        snippet = (d.page_content or "").strip().replace("\n", " ")[:max_chars_per_doc]
+        source = d.metadata.get("source", d.metadata.get("filename", "unknown"))
+        parts.append(f"- {snippet}\n  (Source: {source})")
+    return "Here are the most relevant policy excerpts I found:\n\n" + "\n\n".join(parts)
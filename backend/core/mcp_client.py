@@ -1,21 +1,164 @@
 # core/mcp_client.py
 import asyncio
-from mcp import ClientSession
+import itertools
+from urllib.parse import urlsplit
+
+import httpx
+from mcp import ClientSession, types
 from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+
+from core.config import MCP_SERVER_URLS, MCP_HEALTH_INTERVAL_SECONDS
+
+
+class MCPEndpoint:
+    def __init__(self, url: str):
+        self.url = url
+        parts = urlsplit(url)
+        self.health_url = f"{parts.scheme}://{parts.netloc}/health"
+        self.healthy = True
+        self.outstanding = 0
+        # Streamable-HTTP workers run stateless, so calls need no session or initialize handshake
+        self.stateless = not url.rstrip("/").endswith("/sse")
+        self._client = None
+
+    def connect(self):
+        return sse_client(self.url)
+
+    def http_client(self) -> httpx.AsyncClient:
+        # One keep-alive client per worker, created lazily inside the running loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                headers={
+                    "Accept": "application/json, text/event-stream",
+                    "mcp-protocol-version": types.LATEST_PROTOCOL_VERSION,
+                },
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class MCPClientPool:
+    """
+    Client-side load balancing over stateless MCP workers.
+    Calls go to the healthy worker with the fewest in-flight calls; a worker that
+    fails to connect is marked unhealthy until the next successful health check.
+    """
+
+    def __init__(self, urls):
+        self.endpoints = [MCPEndpoint(u) for u in urls]
+        self._rotation = itertools.count()
+        self._request_ids = itertools.count(1)
+        self._health_task = None
+
+    def _candidates(self):
+        healthy = [e for e in self.endpoints if e.healthy] or self.endpoints
+        # Rotate before sorting so ties are spread across workers
+        offset = next(self._rotation) % len(healthy)
+        rotated = healthy[offset:] + healthy[:offset]
+        return sorted(rotated, key=lambda e: e.outstanding)
+
+    async def _call_stateless(self, endpoint: MCPEndpoint, tool_name: str, args: dict, sent: list):
+        """A single tools/call POST on the worker's persistent connection (server uses json_response)."""
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._request_ids),
+            "method": "tools/call",
+            "params": {"name": tool_name, "arguments": args},
+        }
+        try:
+            resp = await endpoint.http_client().post(endpoint.url, json=payload)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            raise  # never reached the worker
+        except Exception:
+            sent.append(True)
+            raise
+        sent.append(True)
+        resp.raise_for_status()
+        body = resp.json()
+        if "error" in body:
+            raise McpError(types.ErrorData.model_validate(body["error"]))
+        return types.CallToolResult.model_validate(body["result"])
+
+    async def _call_session(self, endpoint: MCPEndpoint, tool_name: str, args: dict, sent: list):
+        async with endpoint.connect() as streams:
+            read_stream, write_stream = streams[0], streams[1]
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                sent.append(True)
+                return await session.call_tool(tool_name, arguments=args)
+
+    async def _call(self, endpoint: MCPEndpoint, tool_name: str, args: dict, sent: list):
+        call = self._call_stateless if endpoint.stateless else self._call_session
+        result = await call(endpoint, tool_name, args, sent)
+
+        outputs = []
+        for c in result.content:
+            if hasattr(c, "text"):
+                outputs.append(c.text)
+        return "\n".join(outputs) if outputs else str(result)
+
+    async def call_tool(self, tool_name: str, args: dict) -> str:
+        last_error = None
+        for endpoint in self._candidates():
+            sent = []
+            endpoint.outstanding += 1
+            try:
+                return await self._call(endpoint, tool_name, args, sent)
+            except Exception as e:
+                last_error = e
+                if sent:
+                    # The tool may already have run; retrying could repeat a write
+                    raise
+                endpoint.healthy = False
+                print(f"⚠️ MCP worker {endpoint.url} unavailable, trying next: {e!r}")
+            finally:
+                endpoint.outstanding -= 1
+        raise last_error
+
+    async def check_health(self):
+        async with httpx.AsyncClient(timeout=2.0) as client:
+
+            async def probe(endpoint: MCPEndpoint):
+                try:
+                    resp = await client.get(endpoint.health_url)
+                    healthy = resp.status_code == 200
+                except httpx.HTTPError:
+                    healthy = False
+                if healthy != endpoint.healthy:
+                    print(f"🩺 MCP worker {endpoint.url} is now {'healthy' if healthy else 'unhealthy'}")
+                endpoint.healthy = healthy
+
+            await asyncio.gather(*(probe(e) for e in self.endpoints))
+
+    async def _health_loop(self, interval: float):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, interval: float = MCP_HEALTH_INTERVAL_SECONDS):
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(interval))
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    async def close(self):
+        await asyncio.gather(*(e.close() for e in self.endpoints))
+
+
+mcp_pool = MCPClientPool(MCP_SERVER_URLS)
 
-MCP_SERVER_URL = "http://127.0.0.1:8050/sse"
 
 async def call_mcp_tool(tool_name: str, args: dict):
     """
     Call an MCP tool and return its textual output.
     """
-    async with sse_client(MCP_SERVER_URL) as (read_stream, write_stream):
-        async with ClientSession(read_stream, write_stream) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, arguments=args)
-
-            outputs = []
-            for c in result.content:
-                if hasattr(c, "text"):
-                    outputs.append(c.text)
-            return "\n".join(outputs) if outputs else str(result)
+    return await mcp_pool.call_tool(tool_name, args)
@@ -0,0 +1,81 @@
+from collections import Counter, defaultdict, deque
+from statistics import mean, median
+
+# Number of times each degraded answer path was taken, keyed by fallback name
+fallback_counts: Counter = Counter()
+
+# Work skipped thanks to session state (intent classification, user lookup)
+session_reuse_counts: Counter = Counter()
+
+# Follow-ups whose fresh retrieval was merged with earlier chunks; this adds context, it skips no work
+session_merge_counts: Counter = Counter()
+
+# Recent latencies (seconds) by turn number within a session
+turn_latencies = defaultdict(lambda: deque(maxlen=500))
+
+# Recent end-to-end latencies (seconds) keyed by intent, then execution mode
+latencies = defaultdict(lambda: defaultdict(lambda: deque(maxlen=500)))
+
+
+def record_fallback(name: str):
+    """Count a fallback so /hr/metrics can report how often it fires."""
+    fallback_counts[name] += 1
+    print(f"⏱️ Fallback used: {name}")
+
+
+def record_session_reuse(kind: str):
+    session_reuse_counts[kind] += 1
+
+
+def record_session_merge(kind: str):
+    session_merge_counts[kind] += 1
+
+
+def record_turn_latency(turn: int, seconds: float):
+    turn_latencies[turn].append(seconds)
+
+
+def record_latency(intent: str, execution: str, seconds: float):
+    latencies[intent][execution].append(seconds)
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+def latency_comparison() -> dict:
+    """Per-intent latency for each execution mode, plus the speculative p50 reduction."""
+    report = {}
+    for intent, by_mode in latencies.items():
+        entry = {}
+        for execution, values in by_mode.items():
+            if values:
+                entry[execution] = {
+                    "count": len(values),
+                    "mean_ms": round(mean(values) * 1000, 1),
+                    "p50_ms": round(median(values) * 1000, 1),
+                    "p95_ms": round(_percentile(values, 0.95) * 1000, 1),
+                }
+        seq, spec = entry.get("sequential"), entry.get("speculative")
+        if seq and spec and seq["p50_ms"] > 0:
+            entry["p50_reduction_pct"] = round(100 * (1 - spec["p50_ms"] / seq["p50_ms"]), 1)
+        report[intent] = entry
+    return report
+
+
+def session_report() -> dict:
+    turns = {
+        turn: {
+            "count": len(values),
+            "mean_ms": round(mean(values) * 1000, 1),
+            "p50_ms": round(median(values) * 1000, 1),
+        }
+        for turn, values in sorted(turn_latencies.items())
+        if values
+    }
+    return {"reuse": dict(session_reuse_counts), "merged": dict(session_merge_counts), "turn_latency": turns}
+
+
+def snapshot() -> dict:
+    return {"fallbacks": dict(fallback_counts), "latency": latency_comparison(), "sessions": session_report()}
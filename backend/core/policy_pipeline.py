@@ -1,11 +1,21 @@
-from metaflow import FlowSpec, step
+from metaflow import FlowSpec, Parameter, step
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_community.vectorstores import FAISS
 import os
+import sys
+
+# Let `python core/policy_pipeline.py run` (from backend/) import the `core` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class HRPolicyPipeline(FlowSpec):
+    generate_faq = Parameter(
+        "generate_faq",
+        help="Precompute answers for the FAQ list and frequently asked policy questions",
+        type=bool,
+        default=False,
+    )
+
     @step
     def start(self):
         print("Starting HR policy document processing pipeline...")
@@ -48,12 +58,71 @@ class HRPolicyPipeline(FlowSpec):
 
     @step
     def create_embeddings(self):
-        embedding_model = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+        from core.embeddings import get_embedding_model
+
+        embedding_model = get_embedding_model()
         self.vector_store = FAISS.from_documents(self.text_chunks, embedding_model)
         self.vector_store.save_local("faiss_hr_policy_index")
         print("ðŸ’¾ Created and saved FAISS index to 'faiss_hr_policy_index'.")
+
+        from core.faq import compute_policy_version, write_index_version
+
+        self.index_version = compute_policy_version(self.pdf_dir)
+        self.embedding_backend = embedding_model.backend
+        write_index_version("faiss_hr_policy_index", self.index_version, embedding_backend=self.embedding_backend)
+        print(f"Index version: {self.index_version}")
+        self.next(self.generate_faq_answers)
+
+    @step
+    def generate_faq_answers(self):
+        from core.config import FAQ_INDEX_PATH
+        from core.faq import faq_answers_stale
+
+        # Existing answers built from older PDFs are regenerated even without --generate_faq
+        stale = faq_answers_stale(FAQ_INDEX_PATH, self.index_version)
+        if self.generate_faq or stale:
+            if stale:
+                print(f"FAQ answers in '{FAQ_INDEX_PATH}' are from an older index version; regenerating.")
+            self._build_faq_answers()
+        else:
+            print("Skipping FAQ answer generation (run with --generate_faq true to enable).")
         self.next(self.end)
 
+    def _build_faq_answers(self):
+        from core.config import (
+            FAQ_INDEX_PATH,
+            FAQ_QUESTIONS_PATH,
+            FAQ_MINED_TOP_N,
+            FAQ_MINED_MIN_COUNT,
+            POLICY_QUERY_LOG,
+        )
+        from core.faq import load_faq_questions, mine_frequent_queries, merge_questions, save_faq_index
+        from core.llm_utils import call_llm, build_prompt_from_docs, LLMUnavailableError
+
+        questions = merge_questions(
+            load_faq_questions(FAQ_QUESTIONS_PATH),
+            mine_frequent_queries(POLICY_QUERY_LOG, FAQ_MINED_TOP_N, FAQ_MINED_MIN_COUNT),
+        )
+        print(f"Generating answers for {len(questions)} FAQ questions.")
+
+        entries, answered = [], []
+        for question in questions:
+            docs = self.vector_store.similarity_search(question, k=4)
+            if not docs:
+                continue
+            try:
+                answer = call_llm(build_prompt_from_docs(docs, question), task="rag")
+            except LLMUnavailableError as e:
+                print(f"⚠️ Skipping '{question}': {e}")
+                continue
+            sources = sorted({d.metadata.get("source", d.metadata.get("filename", "unknown")) for d in docs})
+            entries.append({"question": question, "answer": answer, "sources": sources})
+            answered.append(question)
+
+        embeddings = self.vector_store.embeddings.embed_documents(answered) if answered else []
+        save_faq_index(FAQ_INDEX_PATH, entries, embeddings, self.index_version, self.embedding_backend)
+        print(f"💾 Saved {len(entries)} FAQ answers to '{FAQ_INDEX_PATH}'.")
+
     @step
     def end(self):
         print("âœ… Pipeline completed successfully. Vector store ready for queries.")
@@ -0,0 +1,99 @@
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from core.config import SESSION_TTL_SECONDS, SESSION_MAX_SESSIONS, SESSION_MAX_TURNS, SESSION_MAX_CHUNKS
+
+FOLLOW_UP_PATTERN = re.compile(r"^(and|also|what about|how about|what if|same for)\b", re.IGNORECASE)
+# Longer questions are classified from scratch even if they start like a follow-up
+FOLLOW_UP_MAX_TOKENS = 6
+
+
+def chunk_id(doc) -> str:
+    return getattr(doc, "id", None) or str(hash(doc.page_content))
+
+
+class SessionState:
+    """Compact per-conversation state: recent turns, retrieved chunks and the user record."""
+
+    def __init__(self):
+        self.turns = deque(maxlen=SESSION_MAX_TURNS)  # (query, intent, mode)
+        self.turn_count = 0  # all turns so far; `turns` only keeps the recent ones
+        self.chunks = OrderedDict()  # chunk id -> Document, most recent last
+        self.user_id: Optional[str] = None
+        self.user: Optional[dict] = None
+        self.last_seen = time.monotonic()
+
+    @property
+    def last_turn(self):
+        return self.turns[-1] if self.turns else None
+
+    def is_follow_up(self, query: str) -> bool:
+        query = query.strip()
+        return (
+            self.last_turn is not None
+            and len(query.split()) <= FOLLOW_UP_MAX_TOKENS
+            and bool(FOLLOW_UP_PATTERN.match(query))
+        )
+
+    def remember_docs(self, docs):
+        for doc in docs:
+            key = chunk_id(doc)
+            self.chunks.pop(key, None)
+            self.chunks[key] = doc
+        while len(self.chunks) > SESSION_MAX_CHUNKS:
+            self.chunks.popitem(last=False)
+
+    def extend_docs(self, docs, limit: int = 6):
+        """New docs first, then earlier chunks from this conversation not already included."""
+        merged, seen = [], set()
+        for doc in list(docs) + list(reversed(self.chunks.values())):
+            key = chunk_id(doc)
+            if key not in seen:
+                seen.add(key)
+                merged.append(doc)
+        self.remember_docs(docs)
+        return merged[:limit]
+
+    def cached_user(self, user_id: Optional[str]) -> Optional[dict]:
+        return self.user if user_id and user_id == self.user_id else None
+
+    def remember_user(self, user_id: str, user: dict):
+        self.user_id, self.user = user_id, user
+
+    def record_turn(self, query: str, intent: str, mode: str):
+        self.turns.append((query, intent, mode))
+        self.turn_count += 1
+
+
+class SessionStore:
+    """Sessions keyed by id, bounded by count (LRU) and evicted after an idle TTL."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS, ttl: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_seen <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[oldest_id]
+
+    def get(self, session_id: str) -> SessionState:
+        now = time.monotonic()
+        state = self._sessions.pop(session_id, None)
+        if state is None or now - state.last_seen > self.ttl:
+            state = SessionState()
+        state.last_seen = now
+        self._sessions[session_id] = state
+        self._evict(now)
+        return state
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+sessions = SessionStore()
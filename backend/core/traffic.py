@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import random
+import re
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from typing import Optional
+
+from core.config import (
+    TRAFFIC_CAPTURE_PATH,
+    TRAFFIC_CAPTURE_SAMPLE_RATE,
+    TRAFFIC_CAPTURE_MAX_BYTES,
+    TRAFFIC_CAPTURE_BACKUPS,
+)
+
+# Trace of the request being captured, shared with tasks spawned while serving it
+_trace: ContextVar[Optional[dict]] = ContextVar("traffic_trace", default=None)
+
+# Intents whose query text is kept. Tool intents (add_user, delete_user, ...) name employees,
+# which the patterns below can't catch, so only their intent and mode are captured.
+# Kept queries are pattern-redacted only and may still mention a name.
+QUERY_TEXT_INTENTS = {"policy_query", "leave_balance", "general", "greeting", "small_talk", "none"}
+
+REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"\b[0-9a-fA-F]{24}\b"), "<id>"),
+    (re.compile(r"\+?\d[\d\s().-]{6,}\d"), "<number>"),
+]
+
+
+def redact(text: str) -> str:
+    for pattern, placeholder in REDACTIONS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def pseudonymize(value: Optional[str]) -> Optional[str]:
+    """Stable, non-reversible stand-in so replays keep per-user/per-session grouping."""
+    if not value:
+        return None
+    return hashlib.sha256(value.encode()).hexdigest()[:12]
+
+
+def start_trace() -> dict:
+    trace = {"stages": {}}
+    _trace.set(trace)
+    return trace
+
+
+def annotate(**fields):
+    trace = _trace.get()
+    if trace is not None:
+        trace.update(fields)
+
+
+def add_stage(stage: str, seconds: float):
+    trace = _trace.get()
+    if trace is not None:
+        trace["stages"][stage] = round(trace["stages"].get(stage, 0.0) + seconds * 1000, 1)
+
+
+class TrafficRecorder:
+    """
+    Sampled /hr/query records as JSON lines in a size-rotated log.
+    Writes and rotation happen on a listener thread, off the event loop being measured.
+    """
+
+    def __init__(self, path: str, sample_rate: float, max_bytes: int, backups: int):
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger("hr.traffic")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        queue = SimpleQueue()
+        self.logger.addHandler(QueueHandler(queue))
+        self.listener = QueueListener(queue, handler)
+        self.listener.start()
+
+    def close(self):
+        """Flush queued records to disk."""
+        self.listener.stop()
+
+    def should_sample(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, trace: dict, path: str, status: int, seconds: float, arrived_at: float):
+        """`arrived_at` is the wall-clock arrival time; replays schedule on it."""
+        entry = {
+            "ts": round(arrived_at, 3),
+            "path": path,
+            "status": status,
+            "latency_ms": round(seconds * 1000, 1),
+            "query": redact(trace.get("query", "")) if trace.get("intent") in QUERY_TEXT_INTENTS else None,
+            "user": pseudonymize(trace.get("user_id")),
+            "session": pseudonymize(trace.get("session_id")),
+            "speculative": trace.get("speculative"),
+            "execution": trace.get("execution"),
+            "deadline_seconds": trace.get("deadline_seconds"),
+            "intent": trace.get("intent"),
+            "mode": trace.get("mode"),
+            "stages": trace["stages"],
+        }
+        self.logger.info(json.dumps(entry, separators=(",", ":")))
+
+
+recorder = None
+if TRAFFIC_CAPTURE_PATH:
+    recorder = TrafficRecorder(
+        TRAFFIC_CAPTURE_PATH, TRAFFIC_CAPTURE_SAMPLE_RATE, TRAFFIC_CAPTURE_MAX_BYTES, TRAFFIC_CAPTURE_BACKUPS
+    )
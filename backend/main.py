@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.database import connect_to_mongo, close_mongo_connection
+from core.mcp_client import mcp_pool
+from core import traffic
 from routes import items, hr_assistant
 import os
+import time
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 PORT = os.getenv("PORT", "8000")
@@ -17,6 +20,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in traffic capture (TRAFFIC_CAPTURE_PATH) for benchmarks/traffic_replay.py
+CAPTURED_PATHS = {"/hr/query"}
+
+if traffic.recorder:
+
+    @app.middleware("http")
+    async def capture_traffic(request, call_next):
+        if request.url.path not in CAPTURED_PATHS or not traffic.recorder.should_sample():
+            return await call_next(request)
+        trace = traffic.start_trace()
+        arrived_at = time.time()
+        started = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - started
+        traffic.recorder.record(trace, request.url.path, response.status_code, elapsed, arrived_at)
+        return response
+
 # Register routes
 app.include_router(items.router)
 app.include_router(hr_assistant.router)
@@ -24,15 +44,20 @@ app.include_router(hr_assistant.router)
 @app.on_event("startup")
 async def on_startup():
     await connect_to_mongo()
+    mcp_pool.start_health_checks()
     print(f"🚀 Backend is running on http://127.0.0.1:{PORT}")
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    await mcp_pool.stop_health_checks()
+    await mcp_pool.close()
+    if traffic.recorder:
+        traffic.recorder.close()
     await close_mongo_connection()
 
 @app.get("/")
 def root():
     return {
         "message": "Backend up and running!",
-        "routes": ["/items", "/hr/query"],
+        "routes": ["/items", "/hr/query", "/hr/query/batch", "/hr/metrics"],
     }
@@ -1,25 +1,25 @@
 import asyncio
 import nest_asyncio
 from mcp import ClientSession
-from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
 
 nest_asyncio.apply()  # Needed when running inside interactive shells
 
 """
 ✅ Make sure:
-1. Your server is running with SSE transport:
+1. Your server is running with streamable HTTP transport:
        uv run mcp/mcp_server.py
-2. It listens on port 8050 (default in your server)
+2. It listens on port 8050 (default in your server, path /mcp)
 3. Then run this client:
        uv run mcp/mcp_client.py
 """
 
 async def main():
-    # Connect to the MCP server using SSE
-    async with sse_client("http://127.0.0.1:8050/sse") as (read_stream, write_stream):
+    # Connect to the MCP server using streamable HTTP
+    async with streamablehttp_client("http://127.0.0.1:8050/mcp") as (read_stream, write_stream, _):
         # Create MCP session
         async with ClientSession(read_stream, write_stream) as session:
-            print("✅ Connected to MCP server via SSE")
+            print("✅ Connected to MCP server via streamable HTTP")
 
             # Initialize the connection
             await session.initialize()
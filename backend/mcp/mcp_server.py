@@ -1,9 +1,17 @@
-import asyncio
+import argparse
+import multiprocessing
 import os
+import signal
+import sys
+from contextlib import asynccontextmanager
+
+import uvicorn
 from mcp.server.fastmcp import FastMCP
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
 # ---- Load Environment Variables ----
 load_dotenv()
@@ -12,8 +20,19 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "hr_assistant")
 MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "users")
 
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8050"))
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "streamable-http")
+
 # ---- MCP Server ----
-mcp = FastMCP("HRMCPServer", host="127.0.0.1", port=8050)
+# Stateless HTTP: no per-client session state, so any worker can serve any call
+mcp = FastMCP(
+    "HRMCPServer",
+    host=MCP_HOST,
+    port=MCP_PORT,
+    stateless_http=True,
+    json_response=True,
+)
 
 # ---- MongoDB Setup ----
 mongo_client = None
@@ -21,12 +40,13 @@ users_collection = None
 
 
 async def connect_to_mongo():
-    """Initialize MongoDB connection."""
+    """Initialize MongoDB connection and verify it is reachable."""
     global mongo_client, users_collection
     if mongo_client is None:
         mongo_client = AsyncIOMotorClient(MONGO_URI)
         db = mongo_client[MONGO_DB_NAME]
         users_collection = db[MONGO_COLLECTION]
+        await mongo_client.admin.command("ping")
         print(f"✅ Connected to MongoDB: {MONGO_URI}")
 
 
@@ -38,6 +58,25 @@ async def close_mongo_connection():
         print("🧹 MongoDB connection closed")
 
 
+async def get_users_collection():
+    """Collection opened at worker startup; connects lazily only for the SSE fallback."""
+    if users_collection is None:
+        await connect_to_mongo()
+    return users_collection
+
+
+# ---- Health ----
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Used by the backend's MCP client to route around unhealthy workers."""
+    try:
+        await mongo_client.admin.command("ping")
+    except Exception as e:
+        return JSONResponse({"status": "unhealthy", "error": repr(e)}, status_code=503)
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+
 # ---- MCP Tools ----
 
 @mcp.tool()
@@ -52,9 +91,7 @@ async def add_user(username: str, leave_balance: int = 10, total_leaves: int = 1
     Add a new user to MongoDB.
     Returns the newly created user ID.
     """
-    global users_collection
-    if users_collection is None:
-        await connect_to_mongo()
+    users_collection = await get_users_collection()
 
     user_doc = {
         "username": username,
@@ -71,9 +108,7 @@ async def get_user(user_id: str) -> str:
     """
     Fetch a user's details from MongoDB.
     """
-    global users_collection
-    if users_collection is None:
-        await connect_to_mongo()
+    users_collection = await get_users_collection()
 
     query = {"_id": ObjectId(user_id)} if ObjectId.is_valid(user_id) else {"user_id": user_id}
     user = await users_collection.find_one(query)
@@ -92,9 +127,7 @@ async def list_users(limit: int = 10) -> str:
     """
     List the most recent users from MongoDB.
     """
-    global users_collection
-    if users_collection is None:
-        await connect_to_mongo()
+    users_collection = await get_users_collection()
 
     cursor = users_collection.find().sort("_id", -1).limit(limit)
     users = await cursor.to_list(length=limit)
@@ -117,9 +150,7 @@ async def update_leave_balance(user_id: str, new_balance: int) -> str:
     """
     Update a user's leave balance.
     """
-    global users_collection
-    if users_collection is None:
-        await connect_to_mongo()
+    users_collection = await get_users_collection()
 
     query = {"_id": ObjectId(user_id)} if ObjectId.is_valid(user_id) else {"user_id": user_id}
     result = await users_collection.update_one(query, {"$set": {"leave_balance": new_balance}})
@@ -134,9 +165,7 @@ async def delete_user(user_id: str) -> str:
     """
     Delete a user from MongoDB.
     """
-    global users_collection
-    if users_collection is None:
-        await connect_to_mongo()
+    users_collection = await get_users_collection()
 
     query = {"_id": ObjectId(user_id)} if ObjectId.is_valid(user_id) else {"user_id": user_id}
     result = await users_collection.delete_one(query)
@@ -148,16 +177,61 @@ async def delete_user(user_id: str) -> str:
 
 # ---- Startup & Shutdown ----
 
-async def startup():
-    await connect_to_mongo()
+def build_app():
+    """Streamable HTTP app that opens MongoDB before accepting any tool call."""
+    app = mcp.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await connect_to_mongo()
+        try:
+            async with session_lifespan(app):
+                yield
+        finally:
+            await close_mongo_connection()
+
+    app.router.lifespan_context = lifespan
+    return app
+
 
-async def shutdown():
-    await close_mongo_connection()
+def serve(port: int):
+    print(f"🚀 MCP worker {os.getpid()} listening on http://{MCP_HOST}:{port}/mcp")
+    uvicorn.run(build_app(), host=MCP_HOST, port=port, log_level="warning")
 
 
 if __name__ == "__main__":
-    try:
-        asyncio.run(startup())
-        mcp.run(transport="sse")  # Server-Sent Events transport
-    finally:
-        asyncio.run(shutdown())
+    parser = argparse.ArgumentParser(description="HR MCP server")
+    parser.add_argument("--port", type=int, default=MCP_PORT, help="port of the first worker")
+    parser.add_argument("--workers", type=int, default=1, help="stateless workers on consecutive ports")
+    parser.add_argument("--transport", default=MCP_TRANSPORT, choices=["streamable-http", "sse"])
+    args = parser.parse_args()
+
+    if args.transport == "sse":
+        # Legacy single-process mode; tools connect to MongoDB on first use
+        mcp.settings.port = args.port
+        mcp.run(transport="sse")
+    elif args.workers == 1:
+        serve(args.port)
+    else:
+        workers = [
+            multiprocessing.Process(target=serve, args=(args.port + i,), daemon=True)
+            for i in range(args.workers)
+        ]
+        for w in workers:
+            w.start()
+
+        def stop_workers(signum, frame):
+            # SIGTERM skips multiprocessing's atexit cleanup, so stop the workers explicitly
+            for w in workers:
+                if w.is_alive():
+                    w.terminate()
+            for w in workers:
+                w.join()
+            sys.exit(0)
+
+        # Installed after start() so the workers keep uvicorn's own signal handling
+        signal.signal(signal.SIGTERM, stop_workers)
+        signal.signal(signal.SIGINT, stop_workers)
+        for w in workers:
+            w.join()
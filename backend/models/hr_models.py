@@ -1,11 +1,20 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from core.config import BATCH_MAX_SIZE
 
 class QueryRequest(BaseModel):
     query: str
     user_id: Optional[str] = None
+    # Can only tighten the server budget (QUERY_DEADLINE_SECONDS), never extend it
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    speculative: Optional[bool] = None
+    session_id: Optional[str] = None
 
 class QueryResponse(BaseModel):
     mode: str
     intent: str
     answer: str
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(max_length=BATCH_MAX_SIZE)
+    max_concurrency: Optional[int] = None
@@ -1,27 +1,202 @@
 from fastapi import APIRouter, HTTPException
-from core.intent_detection import detect_intent, detect_intent_llm
-from core.llm_utils import retriever, build_prompt_from_docs, call_llm
-from core.database import get_user_details
-from models.hr_models import QueryRequest, QueryResponse
+from fastapi.responses import StreamingResponse
+from core.intent_detection import detect_intent, detect_intent_llm, detect_intent_embedding
+from core.llm_utils import retriever, faq_index, batch_retrieve, build_prompt_from_docs, call_llm, format_docs_as_answer
+from core.llm_utils import llm_pool, LLMUnavailableError, run_in_llm_executor
+from core.llm_pool import LLMBudgetExceeded
+from core.database import get_user_details, get_users_details
+from core.deadline import Deadline, DeadlineExceeded, run_within
+from core.config import (
+    QUERY_DEADLINE_SECONDS,
+    INTENT_TIMEOUT_SECONDS,
+    SPECULATIVE_EXECUTION,
+    BATCH_MAX_CONCURRENCY,
+)
+from core import metrics, traffic
+from core.faq import log_policy_query
+from core.sessions import sessions
+from models.hr_models import QueryRequest, QueryResponse, BatchQueryRequest
 from core.mcp_client import call_mcp_tool
+import asyncio
 import json
 import re
+import time
 
 router = APIRouter(prefix="/hr", tags=["HR Assistant"])
 
+FALLBACK_MESSAGE = "Sorry, I couldn't complete that answer right now. Please try again in a moment."
+
+# Tools that change the database; a timed-out call may still have been applied
+WRITE_TOOLS = {"add_user", "update_leave_balance", "delete_user"}
+WRITE_UNKNOWN_MESSAGE = (
+    "Sorry, I couldn't confirm whether that change was applied. "
+    "Please check the record before trying again."
+)
+
+# Stage failures that degrade to a cheaper answer instead of an error
+DEGRADED = (DeadlineExceeded, LLMUnavailableError)
+
+# Intents a follow-up ("and for paternity?") inherits from the previous turn
+SESSION_REUSABLE_INTENTS = {"policy_query", "leave_balance"}
+
+
+def _retrieve_docs(query: str):
+    try:
+        return retriever.invoke(query)
+    except Exception:
+        return retriever.get_relevant_documents(query)
+
+
+async def _classify(query: str, deadline: Deadline) -> str:
+    """LLM intent, degrading to embedding-only similarity when the budget runs out."""
+    try:
+        budget = min(deadline.remaining(), INTENT_TIMEOUT_SECONDS)
+        return await run_within(
+            deadline,
+            "intent",
+            run_in_llm_executor(detect_intent_llm, query, timeout=budget),
+            cap=INTENT_TIMEOUT_SECONDS,
+        )
+    except (DeadlineExceeded, LLMUnavailableError):
+        # Raised only when the budget ran out; other LLM failures fall back inside detect_intent_llm
+        metrics.record_fallback("intent_embedding")
+        intent = detect_intent_embedding(query)
+        return "general" if intent == "unknown" else intent
+
+
+def _record_degraded(error: Exception, timeout_name: str, unavailable_name: str):
+    """Count deadline and LLM-outage fallbacks separately."""
+    timed_out = isinstance(error, (DeadlineExceeded, LLMBudgetExceeded))
+    metrics.record_fallback(timeout_name if timed_out else unavailable_name)
+
+
+async def _llm(prompt: str, deadline: Deadline, stage: str, task: str) -> str:
+    return await run_within(
+        deadline, stage, run_in_llm_executor(call_llm, prompt, task, timeout=deadline.remaining())
+    )
+
+
+async def _fetch_docs(query: str, deadline: Deadline, task=None):
+    if task is not None:
+        return await task
+    return await run_within(deadline, "retrieval", asyncio.to_thread(_retrieve_docs, query))
+
+
+async def _fetch_user(user_id: str, deadline: Deadline, task=None):
+    if task is not None:
+        return await task
+    return await run_within(deadline, "user_lookup", get_user_details(user_id))
+
+
+def _discard(task):
+    """Cancel a speculative task whose result is not needed and silence its outcome."""
+    if task is None:
+        return
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def _resolved(value=None, error: Exception = None) -> asyncio.Future:
+    """Wrap an already-known lookup result so it can stand in for a speculative task."""
+    fut = asyncio.get_running_loop().create_future()
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(value)
+    return fut
+
 
 @router.post("/query", response_model=QueryResponse)
 async def handle_query(req: QueryRequest):
+    speculative = SPECULATIVE_EXECUTION if req.speculative is None else req.speculative
+    session = sessions.get(req.session_id) if req.session_id else None
+    started = time.perf_counter()
+    response = await _answer_query(req, speculative, session=session)
+    elapsed = time.perf_counter() - started
+    metrics.record_latency(response.intent, "speculative" if speculative else "sequential", elapsed)
+    if session:
+        session.record_turn(req.query.strip(), response.intent, response.mode)
+        metrics.record_turn_latency(session.turn_count, elapsed)
+    traffic.annotate(
+        query=req.query,
+        user_id=req.user_id,
+        session_id=req.session_id,
+        speculative=req.speculative,  # the client's override, so replays follow the target's default
+        execution="speculative" if speculative else "sequential",
+        deadline_seconds=req.deadline_seconds,
+        intent=response.intent,
+        mode=response.mode,
+    )
+    return response
+
+
+async def _answer_query(
+    req: QueryRequest, speculative: bool, docs_task=None, user_task=None, session=None
+) -> QueryResponse:
     query = req.query.strip()
     if not query:
+        _discard(docs_task)
+        _discard(user_task)
         return QueryResponse(mode="error", intent="none", answer="Empty query provided.")
 
-    intent = detect_intent_llm(query)
+    deadline = Deadline(min(req.deadline_seconds or QUERY_DEADLINE_SECONDS, QUERY_DEADLINE_SECONDS))
+
+    # --- Canonical policy questions are answered from the precomputed FAQ index ---
+    if faq_index:
+        faq_started = time.perf_counter()
+        match = await asyncio.to_thread(faq_index.lookup, query)
+        traffic.add_stage("faq_lookup", time.perf_counter() - faq_started)
+        if match:
+            print(f"📚 FAQ match ({match['score']:.2f}): {match['question']}")
+            _discard(docs_task)
+            _discard(user_task)
+            answer = match["answer"]
+            if match.get("sources"):
+                answer += f"\n\n(Sources: {', '.join(match['sources'])})"
+            return QueryResponse(mode="FAQ", intent="policy_query", answer=answer)
+
+    # --- Follow-ups reuse the previous turn's intent, chunks and user record ---
+    follow_up = session is not None and session.is_follow_up(query)
+    retrieval_query = query
+    if follow_up:
+        previous_query, previous_intent, _ = session.last_turn
+        if previous_intent in SESSION_REUSABLE_INTENTS:
+            # The phrasing alone can't carry the intent over ("what about the adoption policy?"
+            # after a balance question), so the cheap embedding check must not contradict it
+            hint = await asyncio.to_thread(detect_intent_embedding, query)
+            follow_up = hint in (previous_intent, "unknown")
+    if follow_up:
+        retrieval_query = f"{previous_query} {query}"
+    user_from_session = bool(session and user_task is None and session.cached_user(req.user_id))
+    if user_from_session:
+        user_task = _resolved(session.cached_user(req.user_id))
+
+    # --- Speculatively start the cheap lookups while the intent LLM runs ---
+    if speculative:
+        if retriever and docs_task is None:
+            docs_task = asyncio.create_task(_fetch_docs(retrieval_query, deadline))
+        if req.user_id and user_task is None:
+            user_task = asyncio.create_task(_fetch_user(req.user_id, deadline))
+
+    if follow_up and previous_intent in SESSION_REUSABLE_INTENTS:
+        metrics.record_session_reuse("intent")
+        intent = previous_intent
+    else:
+        intent = await _classify(query, deadline)
     print(f"🧠 Detected intent: {intent}")
 
+    if intent != "policy_query":
+        _discard(docs_task)
+    if intent != "leave_balance":
+        _discard(user_task)
+
     # --- Skip tool logic for greetings / small talk ---
     if intent in ["general", "greeting", "small_talk"]:
-        answer = call_llm(query)
+        try:
+            answer = await _llm(query, deadline, "chat", task="chat")
+        except DEGRADED as e:
+            _record_degraded(e, "chat_timeout", "chat_llm_unavailable")
+            answer = FALLBACK_MESSAGE
         return QueryResponse(mode="Direct LLM", intent=intent, answer=answer)
 
     # ---- Leave Balance ----
@@ -29,9 +204,16 @@ async def handle_query(req: QueryRequest):
         if not req.user_id:
             return QueryResponse(mode="API", intent=intent, answer="User ID is required.")
         try:
-            user = await get_user_details(req.user_id)
+            user = await _fetch_user(req.user_id, deadline, user_task)
         except HTTPException as e:
             return QueryResponse(mode="API", intent=intent, answer=e.detail)
+        except DeadlineExceeded:
+            metrics.record_fallback("user_lookup_timeout")
+            return QueryResponse(mode="API", intent=intent, answer=FALLBACK_MESSAGE)
+        if user_from_session:
+            metrics.record_session_reuse("user")
+        elif session:
+            session.remember_user(req.user_id, user)
 
         prompt = f"""
         The user asked: "{req.query}"
@@ -42,19 +224,40 @@ async def handle_query(req: QueryRequest):
 
         Write a friendly response explaining their leave balance.
         """
-        answer = call_llm(prompt)
+        try:
+            answer = await _llm(prompt, deadline, "leave_answer", task="rephrase")
+        except DEGRADED as e:
+            _record_degraded(e, "leave_template", "leave_llm_unavailable")
+            answer = (
+                f"Hi {user['name']}, you have {user['remaining_leaves']} of "
+                f"{user['total_leaves']} leaves remaining."
+            )
+            return QueryResponse(mode="DB", intent=intent, answer=answer)
         return QueryResponse(mode="LLM+DB", intent=intent, answer=answer)
 
     # ---- Policy Query ----
     if intent == "policy_query" and retriever:
+        await asyncio.to_thread(log_policy_query, query)
         try:
-            docs = retriever.invoke(query)
-        except Exception:
-            docs = retriever.get_relevant_documents(query)
+            docs = await _fetch_docs(retrieval_query, deadline, docs_task)
+        except DeadlineExceeded:
+            metrics.record_fallback("retrieval_timeout")
+            return QueryResponse(mode="RAG", intent=intent, answer=FALLBACK_MESSAGE)
+        question = query
+        if follow_up:
+            metrics.record_session_merge("chunks")
+            docs = session.extend_docs(docs)
+            question = f"{query} (follow-up to: {previous_query})"
+        elif session:
+            session.remember_docs(docs)
         if not docs:
             return QueryResponse(mode="RAG", intent=intent, answer="No relevant HR documents found.")
-        prompt = build_prompt_from_docs(docs, query)
-        answer = call_llm(prompt)
+        prompt = build_prompt_from_docs(docs, question)
+        try:
+            answer = await _llm(prompt, deadline, "rag_answer", task="rag")
+        except DEGRADED as e:
+            _record_degraded(e, "rag_snippets", "rag_llm_unavailable")
+            return QueryResponse(mode="Retrieval", intent=intent, answer=format_docs_as_answer(docs))
         return QueryResponse(mode="RAG", intent=intent, answer=answer)
 
     # ---- Default / Tool Handling ----
@@ -85,7 +288,11 @@ async def handle_query(req: QueryRequest):
     User query: {query}
     """
 
-    raw_llm_response = call_llm(tool_prompt)
+    try:
+        raw_llm_response = await _llm(tool_prompt, deadline, "tool_planning", task="tool")
+    except DEGRADED as e:
+        _record_degraded(e, "tool_planning_timeout", "tool_planning_llm_unavailable")
+        return QueryResponse(mode="Direct LLM", intent=intent, answer=FALLBACK_MESSAGE)
     print("🔍 LLM raw output:", raw_llm_response)
 
     # --- Clean and normalize LLM output before parsing ---
@@ -141,9 +348,16 @@ async def handle_query(req: QueryRequest):
             args.setdefault("total_leaves", 100)
 
         try:
-            tool_result = await call_mcp_tool(tool, args)
+            tool_result = await run_within(deadline, "mcp_tool", call_mcp_tool(tool, args))
+        except DeadlineExceeded:
+            metrics.record_fallback("mcp_tool_timeout")
+            # Retrying a write that already ran would repeat it, so don't prompt one
+            answer = WRITE_UNKNOWN_MESSAGE if tool in WRITE_TOOLS else FALLBACK_MESSAGE
+            return QueryResponse(mode="MCP", intent=tool, answer=answer)
         except Exception as e:
             return QueryResponse(mode="MCP", intent=tool, answer=f"Tool call failed: {repr(e)}")
+        if session:
+            session.user = None  # the tool may have changed this user's record
 
         # Let LLM phrase final response but include details
         final_prompt = f"""
@@ -160,7 +374,11 @@ async def handle_query(req: QueryRequest):
         - Keep the tone polite and concise. 
         - Do NOT summarize vaguely like "Here’s the list" — show actual data snippets.
         """
-        final_reply = call_llm(final_prompt)
+        try:
+            final_reply = await _llm(final_prompt, deadline, "tool_answer", task="rephrase")
+        except DEGRADED as e:
+            _record_degraded(e, "tool_raw_output", "tool_answer_llm_unavailable")
+            return QueryResponse(mode="MCP", intent=tool, answer=tool_result)
         return QueryResponse(mode="MCP+LLM", intent=tool, answer=final_reply)
 
 
@@ -168,6 +386,67 @@ async def handle_query(req: QueryRequest):
     return QueryResponse(mode="Direct LLM", intent=intent, answer=raw_llm_response)
 
 
+@router.post("/query/batch")
+async def handle_query_batch(batch: BatchQueryRequest):
+    """
+    Answer many queries at once. Retrieval is one embedding batch + one FAISS search,
+    users come from one $in query, and answers stream back as NDJSON as they finish.
+    """
+    requests = batch.queries
+    queries = [r.query.strip() for r in requests]
+
+    docs_per_query = [None] * len(requests)
+    if retriever:
+        non_empty = [i for i, q in enumerate(queries) if q]
+        retrieved = await asyncio.to_thread(batch_retrieve, [queries[i] for i in non_empty])
+        for i, docs in zip(non_empty, retrieved):
+            docs_per_query[i] = docs
+
+    try:
+        users = await get_users_details([r.user_id for r in requests if r.user_id])
+    except HTTPException:
+        users = None  # fall back to per-query lookups
+
+    # Clients may lower the bound but never raise it past what the LLM executor can serve
+    concurrency = min(batch.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, req: QueryRequest):
+        docs_task = _resolved(docs_per_query[index]) if docs_per_query[index] is not None else None
+        user_task = None
+        if req.user_id and users is not None:
+            user = users.get(req.user_id)
+            user_task = (
+                _resolved(user) if user else _resolved(error=HTTPException(status_code=404, detail="User not found"))
+            )
+        async with semaphore:
+            try:
+                response = await _answer_query(req, speculative=False, docs_task=docs_task, user_task=user_task)
+            except Exception as e:
+                # One failing query must not end the stream for the rest of the batch
+                print(f"❌ Batch query {index} failed: {e!r}")
+                response = QueryResponse(mode="error", intent="none", answer=f"Query failed: {repr(e)}")
+        return index, response
+
+    tasks = [asyncio.create_task(run(i, r)) for i, r in enumerate(requests)]
+
+    async def stream():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, response = await next_done
+                yield json.dumps({"index": index, **response.model_dump()}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.get("/metrics")
+def hr_metrics():
+    return {**metrics.snapshot(), "llm_endpoints": llm_pool.status()}
+
+
 @router.get("/")
 def hr_root():
     return {"status": "ok", "module": "HR Assistant", "intent_detection": True}